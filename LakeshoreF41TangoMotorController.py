@@ -3,10 +3,32 @@ from sardana.pool.controller import MotorController, OneDController
 from sardana.pool.controller import Type, Description, DefaultValue, Access
 from datetime import datetime
 
-from tango import DeviceProxy
+import numpy as np
+from tango import DeviceProxy, DevFailed, EventType
 import time
 
 
+class _AxisState:
+    """Motion bookkeeping of a single axis."""
+
+    __slots__ = (
+        "is_moving",
+        "target",
+        "move_end_time",
+        "deadline",
+        "next_poll",
+        "last_poll",
+    )
+
+    def __init__(self, target):
+        self.is_moving = False
+        self.target = target
+        self.move_end_time = 0
+        self.deadline = 0
+        self.next_poll = 0
+        self.last_poll = None
+
+
 class LakeshoreF41TangoMotorController(MotorController):
     """Sardana motor controller for DESY Lakeshore F41 tango device server.
 
@@ -36,41 +58,114 @@ class LakeshoreF41TangoMotorController(MotorController):
             Description: "Absolute accuracy threshold for closed loop moves (mT)",
             DefaultValue: 0.5,
         },
+        "CL_slew_rate": {
+            Type: float,
+            Access: "read_write",
+            Description: "Expected closed loop slew rate for field polling (mT/s)",
+            DefaultValue: 10.0,
+        },
+        "CL_stall_gap": {
+            Type: float,
+            Access: "read_write",
+            Description: "Gap between moving polls treated as a pool stall (s)",
+            DefaultValue: 1.0,
+        },
         "OL_waittime": {
             Type: float,
             Access: "read_write",
             Description: "Wait time after open loop moves (seconds)",
             DefaultValue: 0.2,
         },
+        "field_cache_ttl": {
+            Type: float,
+            Access: "read_write",
+            Description: "Max age of cached magnetic field reads (seconds)",
+            DefaultValue: 0.05,
+        },
     }
 
     MaxDevice = 2
 
+    # DeviceProxy per tangoFQDN, shared between controller instances
+    _PROXIES = {}
+
     def __init__(self, inst, props, *args, **kwargs):
         super(MotorController, self).__init__(inst, props, *args, **kwargs)
 
         print("Lakeshore F41 Initialization ...")
-        self.proxy = DeviceProxy(self.tangoFQDN)
+        proxy = self._PROXIES.get(self.tangoFQDN)
+        if proxy is None:
+            proxy = self._PROXIES[self.tangoFQDN] = DeviceProxy(self.tangoFQDN)
+        self.proxy = proxy
         self._OL_waittime = 0.2
         self._th_rel = 0.02
         self._th_abs = 0.5
+        self._slew_rate = 10.0
+        self._field_cache_ttl = 0.05
+        self._field_cache = (0, None)
+        self._evt_id = None
+        self._evt_tried = False
+        self._last_field = None
+        self._CMD_TABLE = {"enable": self._enable, "disable": self._disable}
         print("SUCCESS")
         self._timeout = 20
+        self._stall_gap = 1.0
         self._motors = {}
 
     def AddDevice(self, axis):
-        self._motors[axis] = {}
-        self._motors[axis]["is_moving"] = False
-        self._motors[axis]["move_start_time"] = 0
-        self._motors[axis]["move_end_time"] = 0
+        if not self._evt_tried:
+            self._subscribe_field()
         if axis == 0:
             pos = self.proxy.SetPointField
         else:
             pos = self.proxy.SetPointOpenLoop
-        self._motors[axis]["target"] = pos
+        self._motors[axis] = _AxisState(pos)
 
     def DeleteDevice(self, axis):
         del self._motors[axis]
+        if not self._motors:
+            if self._evt_id is not None:
+                self.proxy.unsubscribe_event(self._evt_id)
+                self._evt_id = None
+                self._last_field = None
+            self._evt_tried = False
+
+    def _subscribe_field(self):
+        """Subscribe to MagneticField change events.
+
+        If the device server does not provide change events, the field keeps
+        being polled through the read cache.
+        """
+        self._evt_tried = True
+        try:
+            self._evt_id = self.proxy.subscribe_event(
+                "MagneticField", EventType.CHANGE_EVENT, self._on_field
+            )
+        except DevFailed:
+            self._log.warning("No MagneticField change events, polling instead")
+            self._evt_id = None
+
+    def _on_field(self, evt):
+        if evt.err:
+            self._last_field = None
+        else:
+            self._last_field = evt.attr_value.value
+
+    def _get_field(self):
+        """Return magnetic field (Tesla).
+
+        Uses the last change event value if subscribed. Otherwise reuses
+        reads younger than the TTL, as StateOne is polled frequently during
+        moves and the cache avoids a Tango request on every single poll.
+        """
+        if self._last_field is not None:
+            return self._last_field
+        ts, value = self._field_cache
+        now = time.monotonic()
+        if value is None or (now - ts) >= self._field_cache_ttl:
+            value = self.proxy.MagneticField
+            self._field_cache = (now, value)
+        return value
 
     def StateOne(self, axis):
         """Determine motor state.
@@ -80,39 +175,67 @@ class LakeshoreF41TangoMotorController(MotorController):
         for a specified time.
         """
         limit_switches = MotorController.NoLimitSwitch
-        now = time.time()
-        target = self._motors[axis]["target"]
-        start_time = self._motors[axis]["move_start_time"]
-
-        try:
-            if self._motors[axis]["is_moving"] == False:
-                state = State.On
-            elif axis == 0:  # closed loop, still moving
+        m = self._motors[axis]
+        if not m.is_moving:
+            return State.On, "all fine", limit_switches
+
+        now = time.monotonic()
+        target = m.target
+        th_rel = self._th_rel
+        th_abs = self._th_abs
+
+        if axis == 0:  # closed loop, still moving
+            # last_poll is only set when leaving StateOne with State.Moving,
+            # so the gap covers time between motion loop polls, not time
+            # spent waiting on the device or queries after a fault
+            last_poll, m.last_poll = m.last_poll, None
+            if last_poll is not None:
+                gap = now - last_poll
+                if gap > self._stall_gap:
+                    m.deadline += gap - self._stall_gap
+                    self._log.warning(
+                        "Pool stalled for %.1f s, extending deadline", gap
+                    )
+            # with change events the field read is free, so never skip it
+            if self._evt_id is None and now < m.next_poll:
+                m.last_poll = time.monotonic()
+                return State.Moving, "all fine", limit_switches
+            try:
                 pos = self.ReadOne(axis)
-                diff_abs = abs(pos - target)
-                try:
-                    diff_rel = diff_abs / target
-                except ZeroDivisionError:
-                    diff_rel = 1
-                if (diff_rel > self._th_rel) and (diff_abs > self._th_abs):  # outside threshold
-                    if (now - start_time) < self._timeout:  # no timeout
-                        state = State.Moving
-                    else:  # timeout
-                        self._log.warning("LKSf41 took too long to reach pos.")
-                        self.StopOne(axis)
-                        state = State.On
-                else:  # target reached before timeout
-                    self._motors[axis]["is_moving"] = False
-                    state = State.On
-            else: ## open loop, still moving; no feedback, just wait time
-                # if (now - start_time) < self._OL_waittime:
-                if now < self._motors[axis]["move_end_time"]:
+            except DevFailed:
+                return State.Fault, "Tango failure", limit_switches
+            diff_abs = abs(pos - target)
+            try:
+                diff_rel = diff_abs / abs(target)
+            except ZeroDivisionError:
+                diff_rel = 1
+            if (diff_rel > th_rel) and (diff_abs > th_abs):  # outside threshold
+                if now < m.deadline:  # no timeout
                     state = State.Moving
-                else:
-                    self._motors[axis]["is_moving"] = False
+                    # poll rarely while far from target, faster when close
+                    interval = min(max(0.05, diff_abs / self._slew_rate), 1.0)
+                    if diff_abs < 3 * max(th_abs, th_rel * abs(target)):
+                        interval /= 2
+                    m.next_poll = now + interval
+                else:  # timeout
+                    self._log.warning("LKSf41 took too long to reach pos.")
+                    try:
+                        self.StopOne(axis)
+                    except DevFailed:
+                        return State.Fault, "Tango failure", limit_switches
                     state = State.On
-        except Exception:
-            state = State.Fault
+            else:  # target reached before timeout
+                m.is_moving = False
+                state = State.On
+            if state == State.Moving:
+                m.last_poll = time.monotonic()
+        else: ## open loop, still moving; no feedback, just wait time
+            # if (now - start_time) < self._OL_waittime:
+            if now < m.move_end_time:
+                state = State.Moving
+            else:
+                m.is_moving = False
+                state = State.On
 
         return state, "all fine", limit_switches
 
@@ -123,7 +246,7 @@ class LakeshoreF41TangoMotorController(MotorController):
         in open loop mode.
         """
         if axis == 0:
-            return 1e3 * self.proxy.MagneticField
+            return 1e3 * self._get_field()
         else:
             if self.proxy.OpenLoop == 1:
                 return self.proxy.setpointopenloop
@@ -131,26 +254,30 @@ class LakeshoreF41TangoMotorController(MotorController):
 
     def StartOne(self, axis, position):
         if axis == 0:  # closed loop
-            self.proxy.OpenLoop = 0
-            self.proxy.SetpointField = 1e-3 * position
-            self.proxy.FieldControl = 1
+            openloop = 0
+            setpoint = ("SetpointField", 1e-3 * position)
         else:  # open loop
-            self.proxy.OpenLoop = 1
-            self.proxy.SetpointOpenLoop = position
-            self.proxy.FieldControl = 1
-
-        now = time.time()
-        self._motors[axis]["move_start_time"] = now
-        duration = 3 * abs(self._motors[axis]["target"] - position)
-        self._motors[axis]["move_end_time"] = min(max(1, duration), 10) + now
-        self._motors[axis]["is_moving"] = True
-        self._motors[axis]["target"] = position
+            openloop = 1
+            setpoint = ("SetpointOpenLoop", position)
+        # submit all writes in a single Tango request
+        attrs = [("OpenLoop", openloop), setpoint, ("FieldControl", 1)]
+        self.proxy.write_attributes(attrs)
+
+        now = time.monotonic()
+        m = self._motors[axis]
+        duration = 3 * abs(m.target - position)
+        m.move_end_time = min(max(1, duration), 10) + now
+        m.deadline = now + self._timeout
+        m.next_poll = now
+        m.last_poll = now
+        m.is_moving = True
+        m.target = position
 
     def StopOne(self, axis):
         if axis == 0:
             curr = 1e3 * self.proxy.MagneticField
-            self._motors[axis]["target"] = curr
-            self._motors[axis]["is_moving"] = False
+            self._motors[axis].target = curr
+            self._motors[axis].is_moving = False
             return curr
         else:
             return self.proxy.SetpointOpenLoop
@@ -170,12 +297,34 @@ class LakeshoreF41TangoMotorController(MotorController):
     def setCL_threshold_abs(self, value):
         self._th_abs = value
 
+    def getCL_slew_rate(self):
+        return self._slew_rate
+
+    def setCL_slew_rate(self, value):
+        if value <= 0:
+            raise ValueError("CL_slew_rate must be positive")
+        self._slew_rate = value
+
+    def getCL_stall_gap(self):
+        return self._stall_gap
+
+    def setCL_stall_gap(self, value):
+        if value <= 0:
+            raise ValueError("CL_stall_gap must be positive")
+        self._stall_gap = value
+
     def getOL_waittime(self):
         return self._OL_waittime
 
     def setOL_waittime(self, value):
         self._OL_waittime = value
 
+    def getfield_cache_ttl(self):
+        return self._field_cache_ttl
+
+    def setfield_cache_ttl(self, value):
+        self._field_cache_ttl = value
+
     def SendToCtrl(self, cmd):
         """
         Send custom native commands. The cmd is a space separated string
@@ -186,16 +335,25 @@ class LakeshoreF41TangoMotorController(MotorController):
         :return: string (MANDATORY to avoid OMNI ORB exception)
         """
         # Get the process to send
-        mode = cmd.split(" ")[0].lower()
+        mode = cmd.partition(" ")[0]
+        if not mode.islower():
+            mode = mode.lower()
 
-        if mode == "enable":
-            self.proxy.FieldControl = 1
-        elif mode == "disable":
-            self.proxy.FieldControl = 0
-        else:
+        action = self._CMD_TABLE.get(mode)
+        if action is None:
             self._log.warning("Invalid command")
             return "ERROR: Invalid command requested."
-        pass
+        return action()
+
+    def _enable(self):
+        return self._set_field_control(1)
+
+    def _disable(self):
+        return self._set_field_control(0)
+
+    def _set_field_control(self, value):
+        self.proxy.FieldControl = value
+        return "OK"
 
 
 class LakeshoreF41TangoCounterController(OneDController):
@@ -220,8 +378,9 @@ class LakeshoreF41TangoCounterController(OneDController):
         self.socket = DeviceProxy(self.socket_device)
         self._npts = 1
         self._acquire = False
-        self.field_values = []
-        self.timestamps = []
+        self.field_values = np.empty(0, np.float64)
+        self.timestamps = np.empty(0, np.float64)
+        self._write_idx = 0
 
     def GetAxisPar(self, axis, par):
         if par == "shape":
@@ -231,40 +390,52 @@ class LakeshoreF41TangoCounterController(OneDController):
         if not self._acquire:
             return State.On, "Ready to acquire."
         else:
-            self.fetch_data()
-            if len(self.field_values) >= self._npts:
+            if self._write_idx < self._npts:
+                self.fetch_data()
+            if self._write_idx >= self._npts:
                 self._acquire = False
                 return State.On, "Ready to acquire."
             return State.Moving, "Acquiring data."
 
     def ReadOne(self, axis):
         if axis == 0:
-            return self.field_values[: self._npts]
+            return self.field_values[: self._write_idx]
         if axis == 1:
-            return self.timestamps[: self._npts]
+            return self.timestamps[: self._write_idx]
 
     def LoadOne(self, axis, value, repetitions, latency):
-        self._npts = int(value / 0.2)  # 200 ms per sample
+        self._npts = max(1, round(value / 0.2))  # 200 ms per sample
 
     def StartOne(self, axis):
         pass
 
     def StartAll(self):
         self.socket.write("FETC:BUFF:CLE")
-        self.timestamps = []
-        self.field_values = []
+        self.timestamps = np.empty(self._npts, np.float64)
+        self.field_values = np.empty(self._npts, np.float64)
+        self._write_idx = 0
         self._acquire = True
 
     def StopOne(self, axis):
         self._acquire = False
 
-    def fetch_data(self, bufstr):
-        bufstr = self.socket.writeandread("FETC:BUFF:DC?")
-        lines = bufstr.strip('";\r\n').split(";")
-        values = np.array([line.split(",") for line in lines])
-        tstamps = [datetime.fromisoformat(v) for v in values[:, 0]]
-        tstamps = [datetime.timestamp(t) for t in tstamps]
-        fields = [float(v) for v in values[:, 1]]
-        self.timestamps.append(tstamps)
-        self.field_values.append(fields)
-        return
+    def fetch_data(self):
+        bufstr = self.socket.writeandread("FETC:BUFF:DC?").strip('";\r\n')
+        if not bufstr:
+            return
+        # rows of "timestamp,field" separated by ";"
+        values = np.loadtxt(bufstr.split(";"), delimiter=",", dtype=str, ndmin=2)
+        start = self._write_idx
+        values = values[: self._npts - start]  # drop samples beyond _npts
+        end = start + len(values)
+        tstamps = values[:, 0].astype("datetime64[us]").astype(np.int64) / 1e6
+        # datetime64 treats the device's local times as UTC; shift to epoch
+        offset = round(datetime.fromisoformat(values[0, 0]).timestamp() - tstamps[0])
+        last = round(datetime.fromisoformat(values[-1, 0]).timestamp() - tstamps[-1])
+        if offset == last:
+            tstamps += offset
+        else:  # UTC offset changed within this fetch (DST switch)
+            tstamps = [datetime.fromisoformat(v).timestamp() for v in values[:, 0]]
+        self.timestamps[start:end] = tstamps
+        self.field_values[start:end] = values[:, 1].astype(np.float64)
+        self._write_idx = end